@@ -5,6 +5,7 @@ Optimizado para Render Free Plan
 
 import os
 import sys
+import json
 import logging
 import asyncio
 import subprocess
@@ -13,6 +14,8 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, Any
 
+from performance_model import PerformanceModel, format_prediction
+
 # ===== CONFIGURACIÓN =====
 # Variables configurables (puedes cambiarlas en Render Dashboard)
 API_ID = os.environ.get("API_ID", "20534584")
@@ -24,6 +27,7 @@ PORT = int(os.environ.get("PORT", 8080))
 COMPRESSED_FOLDER = "/tmp/compressed_videos"  # Usar /tmp para permisos
 MAX_PROCESSING_TIME = 840  # 14 minutos (límite Render: 15 min)
 MAX_VIDEO_SIZE = 1900 * 1024 * 1024  # 1.9GB (límite Telegram: 2GB)
+PERFORMANCE_DB = os.environ.get("PERFORMANCE_DB", "/tmp/performance_history.jsonl")
 
 # ===== LOGGING =====
 logging.basicConfig(
@@ -127,7 +131,6 @@ class VideoCompressor:
             if result.returncode != 0:
                 return None
                 
-            import json
             info = json.loads(result.stdout)
             
             # Buscar stream de video
@@ -246,6 +249,9 @@ class VideoCompressor:
         except Exception as e:
             return False, f"Error: {str(e)}"
 
+# ===== MODELO DE RENDIMIENTO =====
+performance_model = PerformanceModel(PERFORMANCE_DB, MAX_PROCESSING_TIME)
+
 # ===== HANDLERS DEL BOT =====
 @app.on_message(filters.command("start"))
 async def start_handler(client: Client, message: Message):
@@ -358,6 +364,7 @@ async def status_handler(client: Client, message: Message):
 • <b>FFmpeg:</b> ✅ Instalado
 • <b>Tiempo máximo:</b> {MAX_PROCESSING_TIME}s
 • <b>Carpeta temporal:</b> {COMPRESSED_FOLDER}
+• <b>Trabajos en historial:</b> {performance_model.total_jobs}
 • <b>Versión:</b> 2026.1.0
 
 <u>🔄 <b>ESTADO RENDER:</b></u>
@@ -389,23 +396,45 @@ async def video_handler(client: Client, message: Message):
         )
         return
     
+    # Predecir tiempo y tamaño con los metadatos de Telegram (solo videos)
+    duration = message.video.duration if message.video else 0
+    width = message.video.width if message.video else 0
+    height = message.video.height if message.video else 0
+    bitrate = int(file_size * 8 / duration) if duration else 0
+    
+    labels = {
+        'low': "⚡ Alta Compresión",
+        'medium': "⚖️ Balanceada",
+        'high': "🎯 Máxima Calidad"
+    }
+    any_over_limit = False
+    for quality in labels:
+        prediction = performance_model.predict(quality, duration, width, height, bitrate)
+        if prediction:
+            if not performance_model.fits_time_limit(prediction):
+                labels[quality] = f"⛔ {labels[quality]}"
+                any_over_limit = True
+            labels[quality] += f" ({format_prediction(prediction)})"
+    
     # Solicitar calidad
     keyboard = InlineKeyboardMarkup([
-        [
-            InlineKeyboardButton("⚡ Alta Compresión", callback_data=f"compress_{user_id}_low"),
-            InlineKeyboardButton("⚖️ Balanceada", callback_data=f"compress_{user_id}_medium")
-        ],
-        [
-            InlineKeyboardButton("🎯 Máxima Calidad", callback_data=f"compress_{user_id}_high"),
-            InlineKeyboardButton("❌ Cancelar", callback_data=f"cancel_{user_id}")
-        ]
+        [InlineKeyboardButton(labels['low'], callback_data=f"compress_{user_id}_low")],
+        [InlineKeyboardButton(labels['medium'], callback_data=f"compress_{user_id}_medium")],
+        [InlineKeyboardButton(labels['high'], callback_data=f"compress_{user_id}_high")],
+        [InlineKeyboardButton("❌ Cancelar", callback_data=f"cancel_{user_id}")]
     ])
     
-    await message.reply_text(
+    prompt = (
         f"📥 <b>Video recibido:</b> {file_size // (1024**2)}MB\n\n"
-        "🔄 <b>Selecciona la calidad de compresión:</b>",
-        reply_markup=keyboard
+        "🔄 <b>Selecciona la calidad de compresión:</b>"
     )
+    if any_over_limit:
+        prompt += (
+            "\n<i>⛔ = podría superar el tiempo máximo; se usará una calidad "
+            "más rápida o se rechazará el video</i>"
+        )
+    
+    await message.reply_text(prompt, reply_markup=keyboard)
     
     # Guardar referencia al mensaje
     if not hasattr(app, 'user_videos'):
@@ -490,8 +519,37 @@ async def callback_handler(client: Client, callback_query: CallbackQuery):
             await msg.download(file_name=download_path)
             download_time = (datetime.now() - download_start).total_seconds()
             
+            # Verificar predicción con la información real del archivo
+            video_info = VideoCompressor.get_video_info(download_path) or {}
+            job_features = (
+                video_info.get('duration', 0),
+                video_info.get('width', 0),
+                video_info.get('height', 0),
+                video_info.get('bitrate', 0)
+            )
+            requested_quality = quality
+            quality, prediction = performance_model.choose_quality(quality, *job_features)
+            
+            if quality is None:
+                await callback_query.message.edit_text(
+                    f"❌ <b>Video demasiado largo para procesar.</b>\n"
+                    f"Ninguna calidad terminaría en menos de {MAX_PROCESSING_TIME}s."
+                )
+                if os.path.exists(download_path):
+                    os.unlink(download_path)
+                return
+            
             # Comprimir video
-            await callback_query.message.edit_text("🔄 <b>Comprimiendo video...</b>")
+            status_text = "🔄 <b>Comprimiendo video...</b>"
+            if quality != requested_quality:
+                logger.info(f"Calidad reducida de {requested_quality} a {quality} por tiempo estimado")
+                status_text += (
+                    f"\n⬇️ Calidad ajustada a <b>{quality_names[quality]}</b> "
+                    f"para no superar el tiempo máximo"
+                )
+            if prediction:
+                status_text += f"\n⏱️ Estimado: {format_prediction(prediction)}"
+            await callback_query.message.edit_text(status_text)
             
             output_path = download_path.replace('.mp4', '_compressed.mp4')
             compressor = VideoCompressor()
@@ -505,6 +563,11 @@ async def callback_handler(client: Client, callback_query: CallbackQuery):
             compress_time = (datetime.now() - compress_start).total_seconds()
             
             if not success:
+                # Un timeout también informa: el tiempo real es al menos compress_time
+                if video_info and compress_time >= MAX_PROCESSING_TIME:
+                    performance_model.record(
+                        quality, *job_features, compress_time, None, timed_out=True
+                    )
                 await callback_query.message.edit_text(
                     f"❌ <b>Error en compresión:</b>\n{result}"
                 )
@@ -514,6 +577,12 @@ async def callback_handler(client: Client, callback_query: CallbackQuery):
                         os.unlink(path)
                 return
             
+            # Registrar trabajo para el modelo de rendimiento
+            if video_info:
+                performance_model.record(
+                    quality, *job_features, compress_time, result['compressed_size']
+                )
+            
             # Enviar video comprimido
             await callback_query.message.edit_text("📤 <b>Enviando video comprimido...</b>")
             
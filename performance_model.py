@@ -0,0 +1,316 @@
+"""
+Modelo de rendimiento: predice tiempo de compresión y tamaño final
+a partir del historial de trabajos completados.
+"""
+
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Any
+
+logger = logging.getLogger(__name__)
+
+MIN_SAMPLES_FOR_PREDICTION = 10  # Trabajos mínimos por calidad antes de predecir
+PREDICTION_SAFETY_FACTOR = 0.85  # Fracción del tiempo máximo aceptada
+QUALITY_ORDER = ['high', 'medium', 'low']  # De más lenta a más rápida
+
+
+class PerformanceModel:
+    """Predice tiempo de compresión y tamaño final a partir del historial.
+
+    Cada trabajo se guarda como una línea JSON en db_path. Por cada calidad
+    se mantiene una regresión ridge sobre características escaladas,
+    acumulando X^T X, X^T y e y^T y para que cada registro actualice el
+    modelo sin recorrer todo el historial.
+
+    Los trabajos que agotan el tiempo no entran en la regresión: su tiempo
+    es solo una cota inferior y usarlo como objetivo haría creer al modelo
+    que esos videos tardan "unos 840 s". Se guardan como suelos: cualquier
+    video de la misma calidad con al menos esos megapíxeles·s se predice
+    con, como mínimo, el tiempo en que se agotó.
+    """
+
+    NUM_FEATURES = 4
+    RIDGE = 1e-3  # Equivale a una fracción de observación; se diluye con el historial
+    Z_SCORE = 2.0  # Cota superior: predicción + Z·σ de los residuos
+    MAX_EXTRAPOLATION = 1.5  # Factor máximo fuera del rango observado
+
+    def __init__(self, db_path: str, time_limit: float):
+        self.db_path = db_path
+        self.time_limit = time_limit
+        self.stats: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    @staticmethod
+    def _features(duration: float, width: int, height: int, bitrate: float) -> list[float]:
+        """Vector de características: sesgo, duración, megapíxeles·s y megabits de origen"""
+        megapixel_seconds = duration * width * height / 1e6
+        source_megabits = duration * bitrate / 1e6
+        return [1.0, duration, megapixel_seconds, source_megabits]
+
+    def _empty_accumulator(self) -> Dict[str, Any]:
+        n = self.NUM_FEATURES
+        return {
+            'count': 0,
+            'xtx': [[0.0] * n for _ in range(n)],
+            'xty': [0.0] * n,
+            'yty': 0.0
+        }
+
+    def _empty_stats(self) -> Dict[str, Any]:
+        return {
+            'time': self._empty_accumulator(),
+            'size': self._empty_accumulator(),
+            'timeouts': [],  # (megapíxeles·s, segundos hasta el timeout)
+            'min_megapixels': float('inf'),
+            'max_megapixels': 0.0,
+            'max_megapixel_seconds': 0.0
+        }
+
+    @staticmethod
+    def _accumulate(acc: Dict[str, Any], x: list[float], y: float):
+        acc['count'] += 1
+        for i, xi in enumerate(x):
+            for j, xj in enumerate(x):
+                acc['xtx'][i][j] += xi * xj
+            acc['xty'][i] += xi * y
+        acc['yty'] += y * y
+
+    def _update(self, record: Dict[str, Any]):
+        """Incorpora un registro a las sumas de su calidad.
+
+        Todos los campos se leen y validan antes de tocar las sumas, así un
+        registro incompleto no deja el modelo a medio actualizar.
+        """
+        quality = str(record['quality'])
+        duration = float(record['duration'])
+        width = int(record['width'])
+        height = int(record['height'])
+        bitrate = float(record.get('bitrate') or 0)
+        encode_seconds = float(record['encode_seconds'])
+        timed_out = bool(record.get('timed_out', False))
+        output_bytes = record.get('output_bytes')
+        if output_bytes is not None:
+            output_bytes = float(output_bytes)
+        if duration <= 0 or width <= 0 or height <= 0 or encode_seconds < 0:
+            raise ValueError("Registro de rendimiento inválido")
+
+        x = self._features(duration, width, height, bitrate)
+        stats = self.stats.setdefault(quality, self._empty_stats())
+
+        if timed_out:
+            stats['timeouts'].append((x[2], encode_seconds))
+            return
+
+        megapixels = width * height / 1e6
+        self._accumulate(stats['time'], x, encode_seconds)
+        if output_bytes is not None:
+            self._accumulate(stats['size'], x, output_bytes)
+        stats['min_megapixels'] = min(stats['min_megapixels'], megapixels)
+        stats['max_megapixels'] = max(stats['max_megapixels'], megapixels)
+        stats['max_megapixel_seconds'] = max(stats['max_megapixel_seconds'], x[2])
+
+    def _load(self):
+        """Reconstruye el modelo desde el historial en disco"""
+        if not os.path.exists(self.db_path):
+            return
+        try:
+            with open(self.db_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        self._update(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        continue
+            logger.info(f"📈 Historial de rendimiento cargado: {self.total_jobs} trabajos")
+        except Exception as e:
+            logger.error(f"Error cargando historial de rendimiento: {e}")
+
+    def record(
+        self,
+        quality: str,
+        duration: float,
+        width: int,
+        height: int,
+        bitrate: int,
+        encode_seconds: float,
+        output_bytes: Optional[int],
+        timed_out: bool = False
+    ):
+        """Guarda un trabajo y actualiza el modelo.
+
+        Si timed_out es True, encode_seconds es el tiempo hasta el timeout y
+        output_bytes es None; el registro se usa como suelo, no en la
+        regresión.
+        """
+        record = {
+            'timestamp': datetime.now().isoformat(),
+            'quality': quality,
+            'duration': duration,
+            'width': width,
+            'height': height,
+            'bitrate': bitrate,
+            'encode_seconds': encode_seconds,
+            'output_bytes': output_bytes,
+            'timed_out': timed_out
+        }
+        try:
+            self._update(record)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Trabajo no registrado en historial: {e}")
+            return
+        try:
+            with open(self.db_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
+        except Exception as e:
+            logger.error(f"Error guardando historial de rendimiento: {e}")
+
+    def _fit(self, acc: Dict[str, Any]) -> Optional[tuple[list[float], float]]:
+        """Ajusta la regresión de un acumulador.
+
+        Devuelve (pesos, σ de los residuos) o None si no hay datos
+        suficientes. Las características se escalan por su RMS para que el
+        ridge no dependa de las unidades; la penalización se suma a la
+        matriz sin normalizar, así su peso cae como 1/count.
+        """
+        n = self.NUM_FEATURES
+        count = acc['count']
+        if count < MIN_SAMPLES_FOR_PREDICTION:
+            return None
+
+        xtx, xty = acc['xtx'], acc['xty']
+        scale = [(xtx[i][i] / count) ** 0.5 or 1.0 for i in range(n)]
+        a = [
+            [xtx[i][j] / (scale[i] * scale[j]) for j in range(n)]
+            + [xty[i] / scale[i]]
+            for i in range(n)
+        ]
+        for i in range(1, n):  # El sesgo no se penaliza
+            a[i][i] += self.RIDGE
+
+        # Eliminación gaussiana con pivoteo parcial
+        for col in range(n):
+            pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+            if abs(a[pivot][col]) < 1e-12:
+                return None
+            a[col], a[pivot] = a[pivot], a[col]
+            for r in range(n):
+                if r != col:
+                    factor = a[r][col] / a[col][col]
+                    for c in range(col, n + 1):
+                        a[r][c] -= factor * a[col][c]
+        weights = [a[i][n] / a[i][i] / scale[i] for i in range(n)]
+
+        # SSE = y'y - 2w'X'y + w'X'Xw
+        sse = acc['yty'] - 2 * sum(w * b for w, b in zip(weights, xty))
+        sse += sum(
+            weights[i] * xtx[i][j] * weights[j]
+            for i in range(n) for j in range(n)
+        )
+        sigma = (max(sse, 0.0) / max(count - n, 1)) ** 0.5
+        return weights, sigma
+
+    def predict(
+        self,
+        quality: str,
+        duration: float,
+        width: int,
+        height: int,
+        bitrate: int
+    ) -> Optional[Dict[str, Optional[float]]]:
+        """Devuelve {'encode_seconds', 'encode_seconds_upper', 'output_bytes'}.
+
+        Devuelve None si no hay datos suficientes o si el video queda fuera
+        del rango de resolución y duración ya observado para esa calidad,
+        salvo que un timeout previo imponga un suelo. output_bytes puede ser
+        None si aún no hay tamaños suficientes.
+        """
+        stats = self.stats.get(quality)
+        if not stats or duration <= 0 or width <= 0 or height <= 0:
+            return None
+
+        x = self._features(duration, width, height, bitrate)
+        floor = max(
+            (seconds for mps, seconds in stats['timeouts'] if x[2] >= mps),
+            default=0.0
+        )
+        floor_only = {
+            'encode_seconds': floor,
+            'encode_seconds_upper': floor,
+            'output_bytes': None
+        } if floor else None
+
+        megapixels = width * height / 1e6
+        if (
+            megapixels > stats['max_megapixels'] * self.MAX_EXTRAPOLATION
+            or megapixels < stats['min_megapixels'] / self.MAX_EXTRAPOLATION
+            or x[2] > stats['max_megapixel_seconds'] * self.MAX_EXTRAPOLATION
+        ):
+            return floor_only
+
+        time_fit = self._fit(stats['time'])
+        if time_fit is None:
+            return floor_only
+        w_time, sigma_time = time_fit
+        encode_seconds = max(sum(w * v for w, v in zip(w_time, x)), floor)
+
+        output_bytes = None
+        size_fit = self._fit(stats['size'])
+        if size_fit is not None:
+            output_bytes = max(sum(w * v for w, v in zip(size_fit[0], x)), 0.0)
+
+        return {
+            'encode_seconds': encode_seconds,
+            'encode_seconds_upper': encode_seconds + self.Z_SCORE * sigma_time,
+            'output_bytes': output_bytes
+        }
+
+    def fits_time_limit(self, prediction: Optional[Dict[str, Optional[float]]]) -> bool:
+        """True si la cota superior cabe en el margen del tiempo máximo"""
+        if not prediction:
+            return True
+        limit = self.time_limit * PREDICTION_SAFETY_FACTOR
+        return prediction['encode_seconds_upper'] <= limit
+
+    def choose_quality(
+        self,
+        quality: str,
+        duration: float,
+        width: int,
+        height: int,
+        bitrate: int
+    ) -> tuple[Optional[str], Optional[Dict[str, Optional[float]]]]:
+        """Baja la calidad si la predicción podría superar el tiempo máximo.
+
+        Devuelve (calidad, predicción); la calidad es None si ninguna opción
+        cabe en el límite. Sin una predicción fiable se respeta la elección.
+        """
+        start = QUALITY_ORDER.index(quality) if quality in QUALITY_ORDER else 0
+        for candidate in QUALITY_ORDER[start:]:
+            prediction = self.predict(candidate, duration, width, height, bitrate)
+            if prediction is None:
+                return candidate, None
+            if self.fits_time_limit(prediction):
+                return candidate, prediction
+        return None, None
+
+    @property
+    def total_jobs(self) -> int:
+        return sum(
+            s['time']['count'] + len(s['timeouts'])
+            for s in self.stats.values()
+        )
+
+
+def format_prediction(prediction: Optional[Dict[str, Optional[float]]]) -> str:
+    """Texto corto para botones: '~2m 10s · ~45MB'"""
+    if not prediction:
+        return ""
+    seconds = int(prediction['encode_seconds'])
+    text = f"~{seconds // 60}m {seconds % 60}s" if seconds >= 60 else f"~{seconds}s"
+    if prediction['output_bytes'] is not None:
+        text += f" · ~{prediction['output_bytes'] / (1024**2):.0f}MB"
+    return text
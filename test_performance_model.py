@@ -0,0 +1,131 @@
+"""Pruebas del modelo de rendimiento"""
+
+import json
+
+import pytest
+
+from performance_model import (
+    MIN_SAMPLES_FOR_PREDICTION,
+    PerformanceModel,
+    format_prediction
+)
+
+TIME_LIMIT = 840
+
+
+def encode_time(duration, width, height):
+    """Tiempo sintético: 1.3 s por megapíxel·s"""
+    return 1.3 * width * height * duration / 1e6
+
+
+def fill(model, quality, count, width=1920, height=1080, rate=1.0, bitrate=4_000_000):
+    for i in range(count):
+        duration = 30 + 210 * i / max(count - 1, 1)
+        model.record(
+            quality, duration, width, height, bitrate,
+            rate * encode_time(duration, width, height),
+            int(duration * 300_000)
+        )
+
+
+@pytest.fixture
+def model(tmp_path):
+    return PerformanceModel(str(tmp_path / "history.jsonl"), TIME_LIMIT)
+
+
+def test_linear_history_is_recovered(model):
+    fill(model, 'high', 2000)
+    for duration in (200, 330):
+        prediction = model.predict('high', duration, 1920, 1080, 4_000_000)
+        assert prediction['encode_seconds'] == pytest.approx(
+            encode_time(duration, 1920, 1080), rel=1e-3
+        )
+        assert prediction['output_bytes'] == pytest.approx(duration * 300_000, rel=1e-3)
+
+
+def test_fit_recovers_known_coefficients(model):
+    for i in range(40):
+        duration = 20 + 7 * i
+        width, height = [(1280, 720), (1920, 1080), (854, 480)][i % 3]
+        bitrate = 1_000_000 + 250_000 * (i % 5)
+        x = model._features(duration, width, height, bitrate)
+        model.record('high', duration, width, height, bitrate,
+                     5 + 0.2 * x[1] + 1.1 * x[2] + 0.05 * x[3], 1)
+    weights, sigma = model._fit(model.stats['high']['time'])
+    assert weights == pytest.approx([5, 0.2, 1.1, 0.05], rel=1e-2, abs=1e-2)
+    assert sigma == pytest.approx(0, abs=0.1)
+
+
+def test_predict_needs_minimum_samples(model):
+    fill(model, 'high', MIN_SAMPLES_FOR_PREDICTION - 1)
+    assert model.predict('high', 100, 1920, 1080, 4_000_000) is None
+    fill(model, 'high', 1)
+    assert model.predict('high', 100, 1920, 1080, 4_000_000) is not None
+
+
+def test_predict_refuses_to_extrapolate(model):
+    fill(model, 'high', 20, width=1280, height=720)
+    assert model.predict('high', 100, 1280, 720, 4_000_000) is not None
+    assert model.predict('high', 100, 3840, 2160, 4_000_000) is None
+    assert model.predict('high', 100, 426, 240, 4_000_000) is None
+    assert model.predict('high', 600, 1280, 720, 4_000_000) is None
+
+
+def test_choose_quality_downgrades_in_order(model):
+    # A 1080p: high ~5.4 s/s, medium ~2.7 s/s, low ~1.3 s/s; límite efectivo 714 s
+    fill(model, 'high', 20, rate=2.0)
+    fill(model, 'medium', 20, rate=1.0)
+    fill(model, 'low', 20, rate=0.5)
+    assert model.choose_quality('high', 60, 1920, 1080, 4_000_000)[0] == 'high'
+    assert model.choose_quality('high', 200, 1920, 1080, 4_000_000)[0] == 'medium'
+    assert model.choose_quality('high', 330, 1920, 1080, 4_000_000)[0] == 'low'
+    assert model.choose_quality('medium', 60, 1920, 1080, 4_000_000)[0] == 'medium'
+
+
+def test_choose_quality_refuses_when_nothing_fits(model):
+    for quality in ('high', 'medium', 'low'):
+        fill(model, quality, 20, rate=8.0)
+    assert model.choose_quality('high', 240, 1920, 1080, 4_000_000) == (None, None)
+
+
+def test_timeouts_are_floors_not_targets(model):
+    fill(model, 'high', 20)
+    before = json.dumps(model.stats['high']['time'])
+    model.record('high', 200, 1920, 1080, 4_000_000, TIME_LIMIT, None, timed_out=True)
+    assert json.dumps(model.stats['high']['time']) == before
+
+    longer = model.predict('high', 220, 1920, 1080, 4_000_000)
+    assert longer['encode_seconds'] >= TIME_LIMIT
+    assert not model.fits_time_limit(longer)
+    shorter = model.predict('high', 100, 1920, 1080, 4_000_000)
+    assert shorter['encode_seconds'] == pytest.approx(encode_time(100, 1920, 1080), rel=1e-3)
+
+
+def test_timeout_floor_applies_without_history(model):
+    model.record('high', 200, 1920, 1080, 4_000_000, TIME_LIMIT, None, timed_out=True)
+    assert model.choose_quality('high', 300, 1920, 1080, 4_000_000) == ('medium', None)
+
+
+def test_history_is_replayed_and_bad_lines_skipped(tmp_path):
+    path = tmp_path / "history.jsonl"
+    model = PerformanceModel(str(path), TIME_LIMIT)
+    fill(model, 'low', 12)
+    model.record('low', 50, 1920, 1080, 4_000_000, TIME_LIMIT, None, timed_out=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"quality": "low", "duration": 10, "width": 1, "height": 1}\n')
+        f.write('no es json\n')
+
+    reloaded = PerformanceModel(str(path), TIME_LIMIT)
+    assert reloaded.total_jobs == 13
+    assert reloaded.stats['low']['time'] == model.stats['low']['time']
+    assert reloaded.stats['low']['timeouts'] == model.stats['low']['timeouts']
+
+
+def test_format_prediction():
+    assert format_prediction(None) == ""
+    assert format_prediction({
+        'encode_seconds': 130, 'encode_seconds_upper': 140, 'output_bytes': 45 * 1024**2
+    }) == "~2m 10s · ~45MB"
+    assert format_prediction({
+        'encode_seconds': 42, 'encode_seconds_upper': 50, 'output_bytes': None
+    }) == "~42s"